@@ -1,11 +1,17 @@
-import math
+from __future__ import annotations
+
+import functools
+import mmap
+import os
+import queue
+import re
+import subprocess
+import tempfile
+import threading
 import tkinter as tk
 from pathlib import Path
 from tkinter import filedialog, messagebox, ttk
 
-import numpy as np
-from moviepy.video.io.ImageSequenceClip import ImageSequenceClip
-
 try:
     from tkinterdnd2 import DND_FILES, TkinterDnD
 
@@ -24,76 +30,227 @@ ASPECT_RATIOS = {
     "9:16": (9, 16),
 }
 BASE_SIZES = [256, 512, 1024]
+PIXEL_SCALES = [1, 2, 4]
+PRESET = "faster"
+PRESETS = ["ultrafast", "superfast", "veryfast", "faster", "fast", "medium"]
+COLOR_MODES = ["RGB", "Grayscale"]
+# Hardware H.264 encoders in order of preference, with their speed-oriented settings.
+HARDWARE_ENCODERS = {
+    "h264_nvenc": [
+        "-pix_fmt", "yuv420p", "-preset", "p4", "-tune", "ll", "-rc", "constqp", "-qp", "20"
+    ],
+    "h264_videotoolbox": ["-pix_fmt", "yuv420p", "-realtime", "1", "-b:v", "20M"],
+    "h264_qsv": ["-pix_fmt", "nv12", "-preset", "veryfast", "-global_quality", "20"],
+    "h264_amf": [
+        "-pix_fmt", "yuv420p", "-quality", "speed", "-rc", "cqp", "-qp_i", "20", "-qp_p", "20"
+    ],
+}
 
+# Drop payloads list paths separated by spaces, with braces around those that include spaces.
+_DROP_PATH_RE = re.compile(r"\{([^}]*)\}|(\S+)")
 
-def bytes_to_frames(data: bytes, width: int, height: int):
-    """Convert raw bytes into RGB frames with consistent layout.
 
-    Bytes are written sequentially into rows, left-to-right then top-to-bottom,
-    using RGB channel order. Each frame is width*height*3 bytes; the final frame
-    is zero-padded if needed so that every pixel deterministically maps to the
-    same byte offsets.
-    """
+@functools.lru_cache(maxsize=1)
+def find_hardware_encoder() -> str | None:
+    """Return the first hardware H.264 encoder that ffmpeg can actually open."""
 
-    frame_size = width * height * 3
-    frames = []
-    if not data:
-        data = b""  # ensure deterministic empty output
+    from imageio_ffmpeg import get_ffmpeg_exe
 
-    for offset in range(0, len(data), frame_size):
-        chunk = data[offset : offset + frame_size]
-        if len(chunk) < frame_size:
-            chunk += bytes(frame_size - len(chunk))
-        frame = np.frombuffer(chunk, dtype=np.uint8).reshape((height, width, 3))
-        frames.append(frame)
+    ffmpeg = get_ffmpeg_exe()
+    try:
+        listing = subprocess.run(
+            [ffmpeg, "-hide_banner", "-encoders"], capture_output=True, text=True, timeout=10
+        ).stdout
+    except (OSError, subprocess.TimeoutExpired):
+        return None
 
-    if not frames:
-        frames.append(np.zeros((height, width, 3), dtype=np.uint8))
+    for encoder in HARDWARE_ENCODERS:
+        if encoder not in listing:
+            continue
+        # Builds list encoders whose device or driver is missing, so encode one frame.
+        try:
+            probe = subprocess.run(
+                [
+                    ffmpeg,
+                    "-hide_banner",
+                    "-loglevel",
+                    "error",
+                    "-f",
+                    "lavfi",
+                    "-i",
+                    "color=size=256x256",
+                    "-frames:v",
+                    "1",
+                    "-c:v",
+                    encoder,
+                    "-f",
+                    "null",
+                    "-",
+                ],
+                capture_output=True,
+                timeout=10,
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            continue
+        if probe.returncode == 0:
+            return encoder
+    return None
+
+
+def convert_file_to_video(
+    file_path: Path,
+    width: int,
+    height: int,
+    fps: int = FPS,
+    pixel_scale: int = 1,
+    preset: str = PRESET,
+    lossless: bool = False,
+    grayscale: bool = False,
+    hardware: bool = False,
+) -> Path:
+    """Convert a binary file into a deterministic pixel-based MP4.
+
+    The file is memory-mapped and streamed to ffmpeg's stdin as raw RGB frames,
+    so pages are read on demand and memory use stays flat regardless of size.
+    A ``pixel_scale`` above 1 blows each data pixel up into a square block using
+    ffmpeg's nearest-neighbor scaler, so only unscaled bytes go through the pipe.
+    With ``lossless`` the frames are encoded at QP 0 without chroma subsampling,
+    so every byte can be recovered exactly from the video. ``grayscale`` maps one byte per pixel,
+    piping a third of the data per frame. With ``hardware`` a GPU/media encoder
+    from ``HARDWARE_ENCODERS`` is used for lossy output when one is available,
+    falling back to libx264 if there is none or the hardware encode fails.
+    """
 
-    return frames
+    from imageio_ffmpeg import get_ffmpeg_exe
+
+    output_path = file_path.with_name(file_path.stem + "_datamosh.mp4")
+
+    frame_size = width * height * (1 if grayscale else 3)
+    command = [
+        get_ffmpeg_exe(),
+        "-y",
+        "-loglevel",
+        "error",
+        "-f",
+        "rawvideo",
+        "-pixel_format",
+        "gray" if grayscale else "rgb24",
+        "-video_size",
+        f"{width}x{height}",
+        "-framerate",
+        str(fps),
+        "-i",
+        "-",
+    ]
+    if pixel_scale > 1:
+        command += [
+            "-vf",
+            f"scale={width * pixel_scale}:{height * pixel_scale}:flags=neighbor",
+        ]
+    if lossless and grayscale:
+        software = ["-c:v", "libx264", "-qp", "0", "-pix_fmt", "gray"]
+    elif lossless:
+        # libx264rgb skips the RGB->YUV conversion and 4:2:0 chroma subsampling
+        software = ["-c:v", "libx264rgb", "-qp", "0", "-pix_fmt", "rgb24"]
+    else:
+        software = ["-c:v", "libx264", "-pix_fmt", "yuv420p"]
+    software += ["-preset", preset, "-tune", "zerolatency", "-threads", "0"]
+    encoder = find_hardware_encoder() if hardware and not lossless else None
+
+    # Open and map the input before starting ffmpeg, so a missing or unreadable
+    # file fails here instead of leaving an encoder waiting on its stdin.
+    with file_path.open("rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+    # Zero-pad the final frame; an empty file becomes one black frame.
+    pad = bytes(-size % frame_size if size else frame_size)
+    try:
+        if encoder:
+            hardware_args = ["-c:v", encoder, *HARDWARE_ENCODERS[encoder]]
+            returncode, stderr = _run_ffmpeg(
+                [*command, *hardware_args, output_path.as_posix()], mm, pad
+            )
+            if returncode == 0:
+                return output_path
+            # Hardware encoders reject frames beyond their size limit (often 4096x4096)
+            # and some driver states; libx264 has no such limit, so retry with it.
+        returncode, stderr = _run_ffmpeg([*command, *software, output_path.as_posix()], mm, pad)
+    finally:
+        if mm is not None:
+            mm.close()
+
+    if returncode != 0:
+        message = stderr.decode(errors="replace").strip()
+        raise RuntimeError(f"ffmpeg exited with code {returncode}: {message}")
 
+    return output_path
 
-def convert_file_to_video(file_path: Path, width: int, height: int, fps: int = FPS) -> Path:
-    """Convert a binary file into a deterministic pixel-based MP4."""
 
-    with file_path.open("rb") as f:
-        data = f.read()
-
-    frames = bytes_to_frames(data, width=width, height=height)
-    clip = ImageSequenceClip(frames, fps=fps)
-
-    output_path = file_path.with_suffix("")
-    output_path = output_path.with_name(output_path.name + "_datamosh.mp4")
-    clip.write_videofile(
-        output_path.as_posix(),
-        codec="libx264",
-        audio=False,
-        fps=fps,
-        preset="slow",
-        ffmpeg_params=["-pix_fmt", "yuv420p"],
-    )
+def _run_ffmpeg(command: list[str], data: mmap.mmap | None, pad: bytes) -> tuple[int, bytes]:
+    """Run ffmpeg, feeding ``data`` then ``pad`` to stdin; returns (returncode, stderr)."""
 
-    return output_path
+    # stderr goes to a file rather than a pipe: nothing drains it while stdin is
+    # being written, so a full pipe buffer would block ffmpeg and us with it.
+    with tempfile.TemporaryFile() as errors:
+        proc = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=errors)
+        try:
+            if data is not None:
+                proc.stdin.write(data)
+            proc.stdin.write(pad)
+        except BrokenPipeError:
+            pass  # ffmpeg exited early; its stderr is reported by the caller
+        except BaseException:
+            proc.kill()
+            proc.communicate()
+            raise
+        proc.communicate()
+        errors.seek(0)
+        return proc.returncode, errors.read()
 
 
 class DataToVideoApp:
     def __init__(self):
         self.root = TkinterDnD.Tk() if DND_AVAILABLE else tk.Tk()
+        # Keep the window hidden until every widget is laid out, so it maps once.
+        self.root.withdraw()
         self.root.title("Data to Video")
-        self.root.geometry("460x360")
+        self.root.geometry("460x430")
         self.root.resizable(False, False)
 
         self.aspect_ratio_var = tk.StringVar(value="16:9")
         self.base_size_var = tk.StringVar(value=str(BASE_SIZES[1]))
         self.fps_var = tk.StringVar(value=str(FPS))
+        self.pixel_scale_var = tk.StringVar(value=str(PIXEL_SCALES[0]))
+        self.preset_var = tk.StringVar(value=PRESET)
+        self.lossless_var = tk.BooleanVar(value=False)
+        self.color_mode_var = tk.StringVar(value=COLOR_MODES[0])
+        self.hardware_var = tk.BooleanVar(value=True)
         self.resolution_var = tk.StringVar()
         self.duration_var = tk.StringVar(value="Estimated duration: —")
         self.selected_file_path: Path | None = None
+        self._file_size: int | None = None
+        self._add_button: ttk.Button | None = None
+        self._preset_combo: ttk.Combobox | None = None
+        self._converting = False
+        self._results: queue.Queue[tuple[str, object]] = queue.Queue()
+
+        # Parsed once per change instead of on every display refresh.
+        self._recompute_settings()
+        for var in (
+            self.aspect_ratio_var,
+            self.base_size_var,
+            self.fps_var,
+            self.pixel_scale_var,
+            self.color_mode_var,
+        ):
+            var.trace_add("write", self._recompute_settings)
 
         self.status_var = tk.StringVar(value="Drop a file or use the Add File button")
 
         self._build_ui()
         self._update_resolution_display()
+        self.root.update_idletasks()
+        self.root.deiconify()
 
     def _build_ui(self):
         padding = {"padx": 16, "pady": 12}
@@ -139,6 +296,56 @@ class DataToVideoApp:
         fps_combo.grid(row=1, column=2, padx=(12, 0), sticky="w")
         fps_combo.bind("<<ComboboxSelected>>", lambda _event: self._on_settings_change())
 
+        ttk.Label(settings, text="Pixel scale").grid(row=2, column=0, pady=(8, 0), sticky="w")
+        scale_combo = ttk.Combobox(
+            settings,
+            textvariable=self.pixel_scale_var,
+            values=[str(value) for value in PIXEL_SCALES],
+            state="readonly",
+            width=10,
+        )
+        scale_combo.grid(row=3, column=0, sticky="w")
+        scale_combo.bind("<<ComboboxSelected>>", lambda _event: self._on_settings_change())
+
+        ttk.Label(settings, text="Encoder preset").grid(
+            row=2, column=1, padx=(12, 0), pady=(8, 0), sticky="w"
+        )
+        self._preset_combo = ttk.Combobox(
+            settings,
+            textvariable=self.preset_var,
+            values=PRESETS,
+            state="readonly",
+            width=10,
+        )
+        self._preset_combo.grid(row=3, column=1, padx=(12, 0), sticky="w")
+
+        ttk.Label(settings, text="Color mode").grid(
+            row=2, column=2, padx=(12, 0), pady=(8, 0), sticky="w"
+        )
+        color_combo = ttk.Combobox(
+            settings,
+            textvariable=self.color_mode_var,
+            values=COLOR_MODES,
+            state="readonly",
+            width=10,
+        )
+        color_combo.grid(row=3, column=2, padx=(12, 0), sticky="w")
+        color_combo.bind("<<ComboboxSelected>>", lambda _event: self._on_settings_change())
+
+        ttk.Checkbutton(
+            settings,
+            text="Lossless",
+            variable=self.lossless_var,
+            command=self._update_preset_state,
+        ).grid(row=4, column=0, pady=(8, 0), sticky="w")
+        ttk.Checkbutton(
+            settings,
+            text="Hardware encoder",
+            variable=self.hardware_var,
+            command=self._update_preset_state,
+        ).grid(row=4, column=1, columnspan=2, padx=(12, 0), pady=(8, 0), sticky="w")
+        self._update_preset_state()
+
         ttk.Label(frame, textvariable=self.resolution_var).pack(anchor="w", pady=(2, 0))
         ttk.Label(frame, textvariable=self.duration_var).pack(anchor="w", pady=(0, 8))
 
@@ -157,8 +364,8 @@ class DataToVideoApp:
             drop_label.drop_target_register(DND_FILES)
             drop_label.dnd_bind("<<Drop>>", self._on_drop)
 
-        button = ttk.Button(frame, text="Add File", command=self._on_add_file)
-        button.pack(pady=(12, 6))
+        self._add_button = ttk.Button(frame, text="Add File", command=self._on_add_file)
+        self._add_button.pack(pady=(12, 6))
 
         status = ttk.Label(frame, textvariable=self.status_var, wraplength=360)
         status.pack(pady=(6, 0))
@@ -168,74 +375,86 @@ class DataToVideoApp:
         if file_path:
             path = Path(file_path)
             self.selected_file_path = path
+            self._file_size = self._stat_size(path)
             self._update_duration_hint()
             self._convert(path)
 
     def _on_drop(self, event):
-        # event.data may contain multiple paths, with braces around those that include spaces.
-        raw_path = event.data.strip()
-
-        paths: list[str] = []
-        current = ""
-        in_brace = False
-
-        for ch in raw_path:
-            if ch == "{":
-                in_brace = True
-                current = ""
-            elif ch == "}":
-                in_brace = False
-                if current:
-                    paths.append(current)
-                    current = ""
-            elif ch == " " and not in_brace:
-                # separator between paths
-                if current:
-                    paths.append(current)
-                    current = ""
-            else:
-                current += ch
-
-        if current:
-            paths.append(current)
+        # The Add File button is disabled while converting, but drops still arrive.
+        if self._converting:
+            messagebox.showinfo(
+                "Conversion in progress",
+                "Please wait for the current conversion to finish, then drop the file again.",
+            )
+            return
 
+        # event.data may contain multiple paths; only the first one is converted.
+        paths = [
+            braced or bare
+            for braced, bare in _DROP_PATH_RE.findall(event.data.strip())
+            if braced or bare
+        ]
         first_path = paths[0] if paths else ""
 
         if first_path:
             path = Path(first_path)
             self.selected_file_path = path
+            self._file_size = self._stat_size(path)
             self._update_duration_hint()
             self._convert(path)
 
+    def _update_preset_state(self):
+        # Hardware encoders take their own settings, so the libx264 preset doesn't apply.
+        uses_hardware = self.hardware_var.get() and not self.lossless_var.get()
+        self._preset_combo.configure(state="disabled" if uses_hardware else "readonly")
+
     def _on_settings_change(self):
         self._update_resolution_display()
         self._update_duration_hint()
 
-    def _current_resolution(self) -> tuple[int, int]:
+    def _recompute_settings(self, *_args):
         aspect = self.aspect_ratio_var.get()
         width_ratio, height_ratio = ASPECT_RATIOS.get(aspect, (1, 1))
         base_width = int(self.base_size_var.get())
         computed_height = max(1, int(round(base_width * (height_ratio / width_ratio))))
-        return base_width, computed_height
+        self._resolution = (base_width, computed_height)
+        self._fps = int(self.fps_var.get())
+        self._pixel_scale = int(self.pixel_scale_var.get())
+        self._grayscale = self.color_mode_var.get() == "Grayscale"
+
+    def _current_resolution(self) -> tuple[int, int]:
+        return self._resolution
 
     def _current_fps(self) -> int:
-        return int(self.fps_var.get())
+        return self._fps
+
+    def _current_pixel_scale(self) -> int:
+        return self._pixel_scale
 
     def _update_resolution_display(self):
         width, height = self._current_resolution()
-        self.resolution_var.set(
-            f"Resolution: {width}×{height} ({self.aspect_ratio_var.get()})"
-        )
+        text = f"Resolution: {width}×{height} ({self.aspect_ratio_var.get()})"
+        scale = self._current_pixel_scale()
+        if scale > 1:
+            text += f" → {width * scale}×{height * scale} output"
+        self.resolution_var.set(text)
+
+    @staticmethod
+    def _stat_size(path: Path) -> int | None:
+        try:
+            return path.stat().st_size
+        except OSError:
+            return None
 
     def _update_duration_hint(self):
-        if not self.selected_file_path or not self.selected_file_path.exists():
+        # The size is read once at selection time, not on every settings change.
+        if self._file_size is None:
             self.duration_var.set("Estimated duration: —")
             return
 
         width, height = self._current_resolution()
-        frame_size = width * height * 3
-        file_size = self.selected_file_path.stat().st_size
-        frames = max(1, math.ceil(file_size / frame_size))
+        frame_size = width * height * (1 if self._grayscale else 3)
+        frames = max(1, -(-self._file_size // frame_size))
         fps = self._current_fps()
         seconds = frames / fps
         self.duration_var.set(
@@ -243,23 +462,57 @@ class DataToVideoApp:
         )
 
     def _convert(self, path: Path):
+        if self._converting:
+            return
+
         if not path.exists():
             messagebox.showerror("Error", f"File not found: {path}")
             return
 
+        width, height = self._current_resolution()
+        options = {
+            "width": width,
+            "height": height,
+            "fps": self._current_fps(),
+            "pixel_scale": self._current_pixel_scale(),
+            "preset": self.preset_var.get(),
+            "lossless": self.lossless_var.get(),
+            "grayscale": self._grayscale,
+            "hardware": self.hardware_var.get(),
+        }
+
+        # Encoding runs on a worker thread so the window keeps repainting.
+        self._converting = True
+        self._add_button.configure(state="disabled")
         self.status_var.set("Converting… this may take a moment")
-        self.root.update_idletasks()
+        threading.Thread(
+            target=self._convert_worker, args=(path, options), daemon=True
+        ).start()
+        self.root.after(100, self._poll_worker)
 
+    def _convert_worker(self, path: Path, options: dict) -> None:
         try:
-            width, height = self._current_resolution()
-            fps = self._current_fps()
-            output_path = convert_file_to_video(path, width=width, height=height, fps=fps)
+            output_path = convert_file_to_video(path, **options)
         except Exception as exc:  # pragma: no cover - GUI level handling
-            messagebox.showerror("Conversion failed", str(exc))
+            self._results.put(("err", str(exc)))
+        else:
+            self._results.put(("ok", output_path))
+
+    def _poll_worker(self):
+        try:
+            status, payload = self._results.get_nowait()
+        except queue.Empty:
+            self.root.after(100, self._poll_worker)
+            return
+
+        self._converting = False
+        self._add_button.configure(state="normal")
+        if status == "err":
+            messagebox.showerror("Conversion failed", payload)
             self.status_var.set("Conversion failed")
         else:
-            self.status_var.set(f"Saved: {output_path}")
-            messagebox.showinfo("Done", f"Video saved to:\n{output_path}")
+            self.status_var.set(f"Saved: {payload}")
+            messagebox.showinfo("Done", f"Video saved to:\n{payload}")
 
 
 def main():
@@ -21,7 +21,7 @@ def _launch_tomato(root: tk.Tk) -> None:
     _ensure_repo_on_path()
     from glitch_hub.tomato_gui import TomatoApp
 
-    TomatoApp(parent=root)
+    TomatoApp.open(parent=root)
 
 
 def main() -> None:
@@ -33,8 +33,8 @@ def main(argv=None):
     parser.add_argument('-m', "--mode", action='store', dest='modevalue',help='choose mode - void, random, reverse, invert, bloom, pulse, jiggle, overlap', default='void')
     parser.add_argument('-c', action='store', dest='countframes', default=1,help="how often to glitch (for modes that support it)")
     parser.add_argument('-n', action='store', dest='positframes', default=1,help="how many frames in the glitch (for modes that support it)")
-    parser.add_argument('-a', action='store', dest='audio', default=0,help="attempt to preserve audio")
-    parser.add_argument('-ff', action='store', dest='firstframe', default=1,help="whether to keep first video frame")
+    parser.add_argument('-a', action='store', dest='audio', default=0, type=int,help="attempt to preserve audio")
+    parser.add_argument('-ff', action='store', dest='firstframe', default=1, type=int,help="whether to keep first video frame")
     parser.add_argument('-k', action='store', dest='kill', default=0.7, type=float,help="max framesize to kill while cleaning")
     
     args = parser.parse_args(argv)
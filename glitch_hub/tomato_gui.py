@@ -1,101 +1,222 @@
+import errno
+import functools
+import logging
+import os
+import queue
+import re
+import shutil
+import subprocess
 import sys
+import threading
 import tkinter as tk
+from collections import deque
+from dataclasses import dataclass
 from pathlib import Path
 from tkinter import filedialog, messagebox, ttk
 
 
-try:
-    from tkinterdnd2 import DND_FILES, TkinterDnD
+log = logging.getLogger(__name__)
 
-    DND_AVAILABLE = True
-except ImportError:  # pragma: no cover - optional dependency
-    TkinterDnD = tk  # type: ignore
-    DND_AVAILABLE = False
+MODES = ("void", "random", "reverse", "invert", "bloom", "pulse", "jiggle", "overlap")
 
+# Drop payloads list paths separated by spaces, with braces around those that include spaces.
+_DROP_PATH_RE = re.compile(r"\{([^}]*)\}|(\S+)")
 
-MODES = ["void", "random", "reverse", "invert", "bloom", "pulse", "jiggle", "overlap"]
 
+@functools.lru_cache(maxsize=None)
+def _load_dnd() -> tuple[str | None, object, bool]:
+    """Import tkinterdnd2 on first use; returns (DND_FILES, TkinterDnD, available)."""
+    try:
+        from tkinterdnd2 import DND_FILES, TkinterDnD
+    except ImportError:  # pragma: no cover - optional dependency
+        return None, tk, False
+    return DND_FILES, TkinterDnD, True
 
-def _ensure_repo_on_path() -> None:
-    repo_root = Path(__file__).resolve().parents[1]
-    if str(repo_root) not in sys.path:
-        sys.path.insert(0, str(repo_root))
+
+# tomato.py runs as a child process; it reports "> step N/<total>" lines as it works.
+_TOMATO_SCRIPT = Path(__file__).resolve().with_name("tomato.py")
+_TOMATO_STEPS = 5
+_STEP_RE = re.compile(rf"^> step (\d+)/{_TOMATO_STEPS}\b")
+
+
+def _run_tomato(args: list[str], results: queue.Queue) -> None:
+    """Run tomato.py with ``args``, posting ("progress", step) to ``results`` as it advances."""
+    tail: deque[str] = deque(maxlen=3)
+    step = 0
+    proc = subprocess.Popen(
+        [sys.executable, "-u", str(_TOMATO_SCRIPT), *args],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+    )
+    with proc:
+        for line in proc.stdout:
+            if line.strip():
+                tail.append(line.rstrip())
+            match = _STEP_RE.match(line)
+            if match:
+                step = int(match.group(1))
+                results.put(("progress", step))
+    # tomato exits with status 0 on bad input, so also require that it reached the last step.
+    if proc.returncode != 0 or step != _TOMATO_STEPS:
+        raise RuntimeError("\n".join(tail) or "Tomato stopped before writing any output.")
 
 
 def _parse_drop_paths(raw_path: str) -> list[str]:
-    paths: list[str] = []
-    current = ""
-    in_brace = False
-
-    for ch in raw_path.strip():
-        if ch == "{":
-            in_brace = True
-            current = ""
-        elif ch == "}":
-            in_brace = False
-            if current:
-                paths.append(current)
-                current = ""
-        elif ch == " " and not in_brace:
-            if current:
-                paths.append(current)
-                current = ""
-        else:
-            current += ch
+    return [
+        braced or bare
+        for braced, bare in _DROP_PATH_RE.findall(raw_path.strip())
+        if braced or bare
+    ]
+
+
+# tomato.py takes its on/off flags as "0"/"1"; index with the BooleanVar value.
+_BOOL = ("0", "1")
 
-    if current:
-        paths.append(current)
+# Every label the aggressiveness slider can show, built once instead of per drag tick.
+_AGG_LABELS = tuple(f"{i}%" for i in range(101))
 
-    return paths
+
+def _agg_percent(aggressiveness: float) -> int:
+    # Aggressiveness is never negative, so adding 0.5 rounds the same way without round().
+    agg_percent = int(aggressiveness * 100 + 0.5)
+    if agg_percent < 0:
+        agg_percent = 0
+    if agg_percent > 100:
+        agg_percent = 100
+    return agg_percent
 
 
+# Pure and keyed on the integer percent, so slider drags mostly hit the cache.
+@functools.lru_cache(maxsize=128)
 def _compute_output_path(
     file_path: Path,
     mode: str,
     countframes: int,
     positframes: int,
-    aggressiveness: float,
+    agg_percent: int,
 ) -> Path:
-    agg_percent = int(round(aggressiveness * 100))
-    if agg_percent < 0:
-        agg_percent = 0
-    if agg_percent > 100:
-        agg_percent = 100
     output_name = f"{file_path.stem}-{mode}-f{countframes}-l{positframes}-a{agg_percent}.avi"
     return file_path.with_name(output_name)
 
 
+@dataclass(frozen=True)
+class TomatoDefaults:
+    """Initial control values, applied on construction and whenever the window is reopened."""
+
+    mode: str = "void"
+    freq: int = 4
+    length: int = 4
+    agg: float = 0.5
+    audio: bool = False
+    firstframe: bool = True
+
+
+def _move_output(output_path: Path, export_path: Path) -> Path:
+    if not output_path.exists():
+        raise FileNotFoundError("Tomato did not create the expected output file.")
+    try:
+        os.replace(output_path, export_path)
+    except OSError as exc:
+        if exc.errno != errno.EXDEV:
+            raise
+        # Different filesystems: fall back to copy + delete.
+        shutil.move(output_path, export_path)
+    return export_path
+
+
 class TomatoApp:
-    def __init__(self, parent: tk.Misc | None = None):
-        _ensure_repo_on_path()
-        if parent and DND_AVAILABLE and hasattr(TkinterDnD, "Toplevel"):
-            self.root = TkinterDnD.Toplevel(parent)
-        elif parent and DND_AVAILABLE:
-            self.root = TkinterDnD.Tk()
+    _instance: "TomatoApp | None" = None
+
+    @classmethod
+    def open(cls, parent: tk.Misc | None = None) -> "TomatoApp":
+        """Show the shared Tomato window, building it only on first use."""
+        instance = cls._instance
+        if instance is not None:
+            try:
+                alive = bool(instance.root.winfo_exists())
+            except tk.TclError:
+                alive = False
+            if alive:
+                instance._reset_defaults()
+                instance._set_slider_defaults()
+                instance._update_run_state()
+                instance.root.deiconify()
+                instance.root.lift()
+                return instance
+
+        cls._instance = cls(parent)
+        return cls._instance
+
+    def __init__(
+        self, parent: tk.Misc | None = None, config: TomatoDefaults = TomatoDefaults()
+    ):
+        self.config = config
+        # tkinterdnd2 is only imported once a window is actually built.
+        self._dnd_files, dnd, self._dnd_available = _load_dnd()
+        if parent and self._dnd_available and hasattr(dnd, "Toplevel"):
+            self.root = dnd.Toplevel(parent)
+        elif parent and self._dnd_available:
+            self.root = dnd.Tk()
         elif parent:
             self.root = tk.Toplevel(parent)
         else:
-            self.root = TkinterDnD.Tk()
+            self.root = dnd.Tk()
         self.root.title("Tomato – AVI Datamosh")
         self.root.geometry("520x480")
         self.root.resizable(False, False)
-
-        self.selected_path_var = tk.StringVar(value="No file selected")
-        self.output_path_var = tk.StringVar(value="Output: (auto)")
-        self.mode_var = tk.StringVar(value="void")
-        self.freq_var = tk.IntVar(value=4)
-        self.length_var = tk.IntVar(value=4)
-        self.agg_var = tk.DoubleVar(value=0.5)
-        self.audio_var = tk.BooleanVar(value=False)
-        self.firstframe_var = tk.BooleanVar(value=True)
+        if parent:
+            # Hidden rather than destroyed so TomatoApp.open() can show it again.
+            self.root.protocol("WM_DELETE_WINDOW", self.root.withdraw)
+
+        # Display-only; the paths themselves live in _input_path/_output_path.
+        self.selected_path_var = tk.StringVar()
+        self.output_path_var = tk.StringVar()
+        self.mode_var = tk.StringVar()
+        self.freq_var = tk.IntVar()
+        self.length_var = tk.IntVar()
+        self.agg_var = tk.DoubleVar()
+        self.audio_var = tk.BooleanVar()
+        self.firstframe_var = tk.BooleanVar()
+        # Slider value readouts, bound to their labels via textvariable.
+        self._count_text = tk.StringVar()
+        self._length_text = tk.StringVar()
+        self._kill_text = tk.StringVar()
+        self._label_texts: dict[str, str] = {}
+        self._input_path: Path | None = None
+        self._input_exists = False
+        self._output_path: Path | None = None
+        self._refresh_pending = False
+        self._updating = False
+        self._reset_defaults()
 
         self._run_button: ttk.Button | None = None
+        self._progress: ttk.Progressbar | None = None
         self.mode_combo: ttk.Combobox | None = None
+        self._results: queue.Queue[tuple[str, object]] = queue.Queue()
 
         self._build_ui()
-        self.mode_var.trace_add("write", lambda *_: self._refresh_output_hint())
         self._update_run_state()
 
+    def _reset_defaults(self) -> None:
+        self.selected_path_var.set("No file selected")
+        self.output_path_var.set("Output: (auto)")
+        self.mode_var.set(self.config.mode)
+        self.freq_var.set(self.config.freq)
+        self.length_var.set(self.config.length)
+        self.agg_var.set(self.config.agg)
+        self.audio_var.set(self.config.audio)
+        self.firstframe_var.set(self.config.firstframe)
+        # Plain-attribute copies of the control values, kept current by the change callbacks.
+        self._mode = self.config.mode
+        self._freq = self.config.freq
+        self._length = self.config.length
+        self._agg = round(self.config.agg, 2)
+        self._input_path = None
+        self._input_exists = False
+        self._output_path = None
+
     def _build_ui(self) -> None:
         frame = ttk.Frame(self.root, padding=16)
         frame.pack(fill="both", expand=True)
@@ -106,7 +227,9 @@ class TomatoApp:
         drop_label = ttk.Label(
             frame,
             text=(
-                "Drop file here" if DND_AVAILABLE else "Install tkinterdnd2 for drag-and-drop"
+                "Drop file here"
+                if self._dnd_available
+                else "Install tkinterdnd2 for drag-and-drop"
             ),
             relief=tk.RIDGE,
             padding=18,
@@ -114,8 +237,8 @@ class TomatoApp:
         )
         drop_label.pack(fill="x", pady=(0, 8))
 
-        if DND_AVAILABLE:
-            drop_label.drop_target_register(DND_FILES)
+        if self._dnd_available:
+            drop_label.drop_target_register(self._dnd_files)
             drop_label.dnd_bind("<<Drop>>", self._on_drop)
 
         ttk.Button(frame, text="Add File", command=self._on_add_file).pack(pady=(0, 12))
@@ -146,7 +269,7 @@ class TomatoApp:
         self.mode_combo.bind("<<ComboboxSelected>>", self._on_mode_change)
 
         ttk.Label(controls, text="Glitch frequency").grid(row=0, column=1, padx=(12, 0), sticky="w")
-        self.count_value_label = ttk.Label(controls, text=str(self.freq_var.get()))
+        self.count_value_label = ttk.Label(controls, textvariable=self._count_text)
         self.count_value_label.grid(row=0, column=2, padx=(8, 0), sticky="e")
         self.count_scale = ttk.Scale(
             controls,
@@ -159,7 +282,7 @@ class TomatoApp:
         self.count_scale.grid(row=1, column=1, columnspan=2, padx=(12, 0), sticky="we")
 
         ttk.Label(controls, text="Glitch length").grid(row=2, column=0, sticky="w", pady=(8, 0))
-        self.length_value_label = ttk.Label(controls, text=str(self.length_var.get()))
+        self.length_value_label = ttk.Label(controls, textvariable=self._length_text)
         self.length_value_label.grid(row=2, column=2, padx=(8, 0), sticky="e")
         self.length_scale = ttk.Scale(
             controls,
@@ -174,7 +297,7 @@ class TomatoApp:
         ttk.Label(controls, text="Aggressiveness").grid(
             row=4, column=0, sticky="w", pady=(8, 0)
         )
-        self.kill_value_label = ttk.Label(controls, text=self._format_agg_label())
+        self.kill_value_label = ttk.Label(controls, textvariable=self._kill_text)
         self.kill_value_label.grid(row=4, column=2, padx=(8, 0), sticky="e")
         self.kill_scale = ttk.Scale(
             controls,
@@ -202,17 +325,28 @@ class TomatoApp:
 
         self._run_button = ttk.Button(frame, text="Run Tomato", command=self._run)
         self._run_button.pack(pady=(16, 0))
+        # Shown in place of the Run button while Tomato works.
+        self._progress = ttk.Progressbar(
+            frame, mode="determinate", maximum=_TOMATO_STEPS, length=200
+        )
 
         self._set_slider_defaults()
 
     def _set_selected_path(self, path: Path) -> None:
         if path.suffix.lower() != ".avi":
             messagebox.showerror("Invalid file", "Please select an .avi file.")
+            self._input_path = None
+            self._input_exists = False
+            self._output_path = None
             self.selected_path_var.set("No file selected")
             self.output_path_var.set("Output: (auto)")
             self._update_run_state()
             return
 
+        self._input_path = path
+        # Checked once here; slider updates rely on this instead of a stat() per tick.
+        self._input_exists = path.exists()
+        self._output_path = None
         self.selected_path_var.set(f"Input: {path}")
         self.output_path_var.set(f"Output: {self._default_output_path(path)}")
         self._update_run_state()
@@ -232,8 +366,8 @@ class TomatoApp:
             self._set_selected_path(Path(paths[0]))
 
     def _on_export_to(self) -> None:
-        input_path = Path(self.selected_path_var.get().replace("Input: ", ""))
-        if not input_path.exists():
+        input_path = self._input_path
+        if input_path is None or not self._input_exists:
             messagebox.showerror("Missing file", "Please select an input .avi file first.")
             return
 
@@ -246,14 +380,14 @@ class TomatoApp:
             filetypes=[("AVI files", "*.avi")],
         )
         if save_path:
+            self._output_path = Path(save_path)
             self.output_path_var.set(f"Output: {save_path}")
 
     def _update_run_state(self) -> None:
         if not self._run_button:
             return
 
-        path = Path(self.selected_path_var.get().replace("Input: ", ""))
-        enabled = path.exists() and path.suffix.lower() == ".avi"
+        enabled = self._input_path is not None and self._input_exists
         state = "normal" if enabled else "disabled"
         self._run_button.configure(state=state)
 
@@ -261,119 +395,176 @@ class TomatoApp:
         return _compute_output_path(
             input_path,
             mode=self._current_mode(),
-            countframes=self.freq_var.get(),
-            positframes=self.length_var.get(),
-            aggressiveness=self.agg_var.get(),
+            countframes=self._freq,
+            positframes=self._length,
+            agg_percent=_agg_percent(self._agg),
         )
 
     def _build_args(self, input_path: Path) -> list[str]:
-        args = [
+        return [
             "-i",
             str(input_path),
             "-m",
             self._current_mode(),
             "-c",
-            str(self.freq_var.get()),
+            str(self._freq),
             "-n",
-            str(self.length_var.get()),
+            str(self._length),
             "-k",
-            f"{self.agg_var.get():.2f}",
+            f"{self._agg:.2f}",
+            "-ff",
+            _BOOL[self.firstframe_var.get()],
+            "-a",
+            _BOOL[self.audio_var.get()],
         ]
-        if self.audio_var.get():
-            args.extend(["-a", "1"])
-        if self.firstframe_var.get():
-            args.extend(["-ff", "1"])
-        else:
-            args.extend(["-ff", "0"])
-        return args
 
     def _run(self) -> None:
-        input_path = Path(self.selected_path_var.get().replace("Input: ", ""))
-        if not input_path.exists() or input_path.suffix.lower() != ".avi":
+        input_path = self._input_path
+        # Re-check right before launching, since the file may have moved since selection.
+        self._input_exists = input_path is not None and input_path.exists()
+        if not self._input_exists:
             messagebox.showerror("Invalid file", "Please select a valid .avi file.")
             self._update_run_state()
             return
 
-        export_path_text = self.output_path_var.get().replace("Output: ", "").strip()
-        export_path = Path(export_path_text) if export_path_text and export_path_text != "(auto)" else None
+        export_path = self._output_path
 
         args = self._build_args(input_path)
-        print("Tomato args:", args)
+        output_path = self._default_output_path(input_path)
+        log.debug("Tomato args: %s", args)
+
+        # Tomato runs in a child process watched by a worker thread, so the window keeps repainting.
+        self._run_button.pack_forget()
+        self._progress["value"] = 0
+        self._progress.pack(pady=(16, 0))
+        threading.Thread(
+            target=self._run_worker, args=(args, output_path, export_path), daemon=True
+        ).start()
+        self.root.after(100, self._poll_worker)
+
+    def _run_worker(self, args: list[str], output_path: Path, export_path: Path | None) -> None:
         try:
-            from glitch_hub import tomato
-
-            tomato.main(args)
+            _run_tomato(args, self._results)
+            # Renaming can turn into a multi-GB copy across mounts, so it stays off the UI thread.
+            if export_path and export_path != output_path:
+                output_path = _move_output(output_path, export_path)
         except Exception as exc:  # pragma: no cover - UI guard
-            messagebox.showerror("Tomato failed", str(exc))
-            return
-
-        output_path = self._default_output_path(input_path)
-        if export_path and export_path != output_path:
-            if output_path.exists():
-                output_path.replace(export_path)
-                output_path = export_path
-            else:
-                messagebox.showerror(
-                    "Tomato failed",
-                    "Tomato did not create the expected output file.",
-                )
+            self._results.put(("err", str(exc)))
+        else:
+            self._results.put(("ok", output_path))
+
+    def _poll_worker(self) -> None:
+        while True:
+            try:
+                status, payload = self._results.get_nowait()
+            except queue.Empty:
+                self.root.after(100, self._poll_worker)
                 return
+            if status != "progress":
+                break
+            self._progress["value"] = payload
+
+        self._progress.pack_forget()
+        self._run_button.pack(pady=(16, 0))
+        self._update_run_state()
 
-        messagebox.showinfo("Tomato complete", f"Output saved to:\n{output_path}")
+        if status == "err":
+            messagebox.showerror("Tomato failed", payload)
+            return
+
+        messagebox.showinfo("Tomato complete", f"Output saved to:\n{payload}")
 
     def _set_slider_defaults(self) -> None:
-        self.count_scale.set(self.freq_var.get())
-        self.length_scale.set(self.length_var.get())
-        self.kill_scale.set(self.agg_var.get())
-        self._on_count_change(str(self.freq_var.get()))
-        self._on_length_change(str(self.length_var.get()))
-        self._on_kill_change(str(self.agg_var.get()))
+        # Scale.set() invokes each slider's command; suppress those and update once instead.
+        self._updating = True
+        try:
+            self.count_scale.set(self._freq)
+            self.length_scale.set(self._length)
+            self.kill_scale.set(self._agg)
+        finally:
+            self._updating = False
+        self._recompute_labels_once()
+        self.root.update_idletasks()
+
+    def _recompute_labels_once(self) -> None:
+        self._set_label_text(self._count_text, str(self._freq))
+        self._set_label_text(self._length_text, str(self._length))
+        self._set_label_text(self._kill_text, self._format_agg_label())
+        self._refresh_output_hint()
+
+    def _set_var_quietly(self, var: tk.Variable, value: object) -> None:
+        # Clamping writes back to the Scale's variable; don't let that re-enter the callbacks.
+        self._updating = True
+        try:
+            var.set(value)
+        finally:
+            self._updating = False
 
     def _on_count_change(self, value: str) -> None:
+        if self._updating:
+            return
         count = max(1, int(float(value)))
         if count > 12:
             count = 12
-        self.freq_var.set(count)
-        self.count_value_label.config(text=str(count))
+        self._freq = count
+        self._set_var_quietly(self.freq_var, count)
+        self._set_label_text(self._count_text, str(count))
         self._refresh_output_hint()
 
     def _on_length_change(self, value: str) -> None:
+        if self._updating:
+            return
         length = max(1, int(float(value)))
         if length > 12:
             length = 12
-        self.length_var.set(length)
-        self.length_value_label.config(text=str(length))
+        self._length = length
+        self._set_var_quietly(self.length_var, length)
+        self._set_label_text(self._length_text, str(length))
         self._refresh_output_hint()
 
     def _on_kill_change(self, value: str) -> None:
+        if self._updating:
+            return
         kill = float(value)
         if kill < 0.30:
             kill = 0.30
         if kill > 1.00:
             kill = 1.00
-        self.agg_var.set(kill)
-        self.kill_value_label.config(text=self._format_agg_label())
+        # Quantize to what "-k" sends, so the label and predicted file name agree with tomato.py.
+        kill = round(kill, 2)
+        self._agg = kill
+        self._set_var_quietly(self.agg_var, kill)
+        self._set_label_text(self._kill_text, self._format_agg_label())
         self._refresh_output_hint()
 
+    def _set_label_text(self, var: tk.StringVar, text: str) -> None:
+        # Most drag ticks land on the same clamped value; skip the write and redraw then.
+        if self._label_texts.get(str(var)) != text:
+            self._label_texts[str(var)] = text
+            var.set(text)
+
     def _format_agg_label(self) -> str:
-        percent = int(round(self.agg_var.get() * 100))
-        return f"{percent}%"
+        return _AGG_LABELS[_agg_percent(self._agg)]
 
     def _current_mode(self) -> str:
-        if self.mode_combo is not None:
-            selected = self.mode_combo.get()
-            if selected:
-                self.mode_var.set(selected)
-        return self.mode_var.get()
+        return self._mode
 
     def _on_mode_change(self, _event: tk.Event) -> None:
-        self._current_mode()
+        self._mode = self.mode_var.get()
         self._refresh_output_hint()
 
     def _refresh_output_hint(self) -> None:
-        input_text = self.selected_path_var.get().replace("Input: ", "")
-        input_path = Path(input_text) if input_text and input_text != "No file selected" else None
-        if input_path and input_path.exists():
+        # Slider drags fire many times per second; recompute once per idle cycle.
+        if self._refresh_pending:
+            return
+        self._refresh_pending = True
+        self.root.after_idle(self._do_refresh_output_hint)
+
+    def _do_refresh_output_hint(self) -> None:
+        self._refresh_pending = False
+        # An explicit Export To… choice is kept; only the automatic name follows the settings.
+        input_path = self._input_path
+        if self._output_path is None and input_path and self._input_exists:
             self.output_path_var.set(f"Output: {self._default_output_path(input_path)}")
 
     def run(self) -> None: